@@ -1,7 +1,13 @@
 import argparse
+import concurrent.futures
+import os
+import queue
+import threading
 
 from langchain import hub
 from langchain.agents import AgentExecutor, create_json_chat_agent
+from langchain.globals import set_llm_cache
+from langchain_community.cache import SQLiteCache
 from langchain_core.prompts import PromptTemplate
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
@@ -9,9 +15,15 @@ from tqdm.auto import tqdm
 
 import utils
 
+# With temperature=0 the completions are deterministic, so cache them on disk:
+# repeat runs on the same problem statement cost nothing
+set_llm_cache(SQLiteCache(database_path='.llm_cache.sqlite'))
+
 llm = ChatOpenAI(model_name='gpt-4o', temperature=0)
 
-# Instructions for the agent to stress test a fast solution
+# Instructions for the agent to stress test a fast solution.
+# All static instructions come first and the problem statement goes last, so the
+# provider-side prompt prefix cache covers the whole instruction block across problems.
 agent_prompt = PromptTemplate.from_template("""
 You are given a competitive programming problem statement.
 Your task is to stress test a fast solution for the given problem.
@@ -32,20 +44,44 @@ Slow solution should be written in slow.cpp and generator should be written in g
 
 Don't try using multiple tools at once. Think about the slow solution first, then the generator, and finally the stress test.
 
-Problem Statement:
-{problem_statement}
-
 Don't stop until you have run the stress test.
 
 Don't run multiple tools at once. First, write the slow solution, then the generator, and finally the stress test.
 
 At the end, deliver your verdict. Is the fast solution correct?
+
+Problem Statement:
+{problem_statement}
 """)
 
 # Instructions for the LLM to output everything in JSON format
 chat_prompt = hub.pull("hwchase17/react-chat-json")
 
 
+def _one_iteration(test_cases: queue.Queue, abort: threading.Event, slow_path: str, fast_path: str):
+    """
+    Verify one prefetched test case. Return the (test case, slow output, fast output)
+    triple on a mismatch, or None if the outputs agree or the run was aborted.
+    """
+    # Poll rather than block forever so workers drain cleanly on abort
+    while not abort.is_set():
+        try:
+            gen_output = test_cases.get(timeout=0.1)
+            break
+        except queue.Empty:
+            continue
+    else:
+        return None
+    # The slow and fast solutions are independent once the test case exists,
+    # so run them concurrently instead of waiting on each in turn
+    (slow_output, _), (fast_output, _) = utils.invoke_concurrently([slow_path, fast_path], gen_output)
+
+    # A timeout counts as a failure so a hung solution is reported, not ignored
+    if utils.TIMED_OUT in (slow_output, fast_output) or slow_output.strip() != fast_output.strip():
+        return gen_output, slow_output, fast_output
+    return None
+
+
 def stress_test(input_src: str, codeforces_url: str, compiler_command=None, fast_path="./fast",
                 slow_code_path="./slow.cpp", slow_path="./slow",
                 gen_code_path="./gen.cpp", gen_path="./gen", iters=1000):
@@ -60,7 +96,7 @@ def stress_test(input_src: str, codeforces_url: str, compiler_command=None, fast
         """
         Write the content to the given file.
         """
-        with open(file_path, 'w') as f:
+        with open(file_path, 'w', buffering=1 << 16) as f:
             f.write(content)
 
     @tool
@@ -72,21 +108,48 @@ def stress_test(input_src: str, codeforces_url: str, compiler_command=None, fast
             utils.compile(compiler_command, slow_code_path, slow_path)
             utils.compile(compiler_command, gen_code_path, gen_path)
 
-            # Stress test
-            for _ in tqdm(range(iters), desc="Stress Testing", total=iters):
-                # Generate test case
-                gen_output, _ = utils.invoke(gen_path, '')
-                # Run the slow solution
-                slow_output, _ = utils.invoke(slow_path, gen_output)
-                # Run the fast solution
-                fast_output, _ = utils.invoke(fast_path, gen_output)
-
-                if slow_output.strip() != fast_output.strip():
-                    print(f"Test case: {gen_output}")
-                    print(f"Slow output: {slow_output}")
-                    print(f"Fast output: {fast_output}")
-                    print("Outputs do not match.")
-                    return "Outputs do not match. Stress test failed."
+            # Stress test: iterations are independent, so shard them across a worker pool.
+            # The work is subprocess-bound, so threads are enough; leave a couple of cores free.
+            workers = max(1, os.cpu_count() - 2)
+
+            # Keep the generator running ahead of the verifiers: a producer thread
+            # fills a small bounded queue so generator time overlaps solution time
+            abort = threading.Event()
+            test_cases = queue.Queue(maxsize=4)
+
+            def generate_test_cases():
+                for _ in range(iters):
+                    if abort.is_set():
+                        break
+                    gen_output, _ = utils.invoke(gen_path, b'')
+                    test_cases.put(gen_output)
+
+            producer = threading.Thread(target=generate_test_cases, daemon=True)
+            producer.start()
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_one_iteration, test_cases, abort, slow_path, fast_path)
+                           for _ in range(iters)]
+                for future in tqdm(concurrent.futures.as_completed(futures),
+                                   desc="Stress Testing", total=iters):
+                    mismatch = future.result()
+                    if mismatch is not None:
+                        # Short-circuit: stop generating, drop pending iterations and
+                        # unblock a producer stuck on a full queue
+                        abort.set()
+                        for remaining in futures:
+                            remaining.cancel()
+                        while not test_cases.empty():
+                            try:
+                                test_cases.get_nowait()
+                            except queue.Empty:
+                                break
+                        gen_output, slow_output, fast_output = mismatch
+                        print(f"Test case: {gen_output.decode(errors='replace')}")
+                        print(f"Slow output: {slow_output.decode(errors='replace')}")
+                        print(f"Fast output: {fast_output.decode(errors='replace')}")
+                        print("Outputs do not match.")
+                        return "Outputs do not match. Stress test failed."
             return "All outputs match. Stress test passed."
         except Exception as e:
             return f"Error: {e}"
@@ -1,53 +1,166 @@
+import asyncio
+import functools
+import hashlib
+import json
 import re
+import shlex
+import shutil
 import subprocess
-import tempfile
+import time
+from pathlib import Path
 from typing import Tuple, Union, List
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
 from dotenv import load_dotenv
 from langchain_core.messages import AIMessage
 
 load_dotenv()
 
+# A persistent client reuses connections (and multiplexes over HTTP/2) across fetches
+_http_client = httpx.Client(http2=True, follow_redirects=True, timeout=10)
 
+
+# Problem statements are immutable, so cache them on disk between runs
+CACHE_DIR = Path.home() / '.cache' / 'ai-stress-tester'
+STATEMENT_CACHE_TTL = 7 * 24 * 60 * 60  # 7 days, in case a statement gets clarified
+
+
+@functools.lru_cache(maxsize=128)
 def get_codeforces_statement(codeforces_url: str) -> str:
     """
     This function retrieves the problem statement from the given Codeforces URL.
+    Statements are cached on disk (keyed by URL) to avoid refetching on every invocation.
     """
-    response = requests.get(codeforces_url)
+    cache_file = CACHE_DIR / f'{hashlib.sha256(codeforces_url.encode()).hexdigest()}.json'
+    if cache_file.exists():
+        cached = json.loads(cache_file.read_text())
+        if time.time() - cached['fetched_at'] < STATEMENT_CACHE_TTL:
+            return cached['statement']
+
+    statement = _fetch_codeforces_statement(codeforces_url)
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps({'url': codeforces_url, 'fetched_at': time.time(), 'statement': statement}))
+    return statement
+
+
+def _fetch_codeforces_statement(codeforces_url: str) -> str:
+    response = _http_client.get(codeforces_url)
     if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        statement = soup.find('div', class_='problem-statement')
-        if statement:
-            return statement.get_text(strip=True, separator='\n')
-        else:
-            raise ValueError('Problem statement not found.')
+        return _parse_statement(response.content)
     else:
         raise ValueError(f'Failed to fetch the URL. Status code: {response.status_code}')
 
 
-def compile(compile_command: str, source_file: str, output_file: str) -> None:
+# Keyed by a blake2b digest of the raw HTML, so identical pages skip the soup walk
+_statement_parse_cache = {}
+
+
+def _parse_statement(html: bytes) -> str:
+    key = hashlib.blake2b(html, digest_size=16).digest()
+    cached = _statement_parse_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Codeforces pages are large; the lxml parser is several times faster than
+    # html.parser and the strainer restricts parsing to the statement div
+    strainer = SoupStrainer('div', class_='problem-statement')
+    soup = BeautifulSoup(html, 'lxml', parse_only=strainer)
+    statement = soup.find('div', class_='problem-statement')
+    if not statement:
+        raise ValueError('Problem statement not found.')
+
+    text = statement.get_text(strip=True, separator='\n')
+    _statement_parse_cache[key] = text
+    return text
+
+
+def compile(compile_command: str, source_file: str, output_file: str, opt_flags: str = '-O2 -pipe') -> None:
     """
     This function compiles the source file using the given compile command.
+    The solutions are tight CPU loops run many times, so optimize at -O2 by default;
+    -pipe keeps the compiler stages off the filesystem.
+    Binaries are cached under ~/.cache/ai-stress-tester/bin keyed by the source
+    content and compile command, so unchanged sources skip the compiler entirely.
     """
+    full_command = f'{compile_command} {opt_flags}'
+    key = hashlib.sha256(Path(source_file).read_bytes() + full_command.encode()).hexdigest()
+    cached_binary = CACHE_DIR / 'bin' / key
+    if cached_binary.exists():
+        shutil.copy(cached_binary, output_file)
+        return
+
     try:
-        subprocess.run(f'{compile_command} {source_file} -o {output_file}', shell=True, check=True)
+        # Exec the compiler directly: no intermediate shell startup, and paths
+        # with spaces can't be misparsed
+        subprocess.run(shlex.split(full_command) + [source_file, '-o', output_file], check=True)
     except subprocess.CalledProcessError as e:
         print(f'Failed to compile the source file. Error: {e}')
         exit(1)
 
+    cached_binary.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy(output_file, cached_binary)
 
-def invoke(executable: str, input_text: str) -> Tuple[str, int]:
-    with tempfile.TemporaryFile('w+t') as temp_input:
-        temp_input.write(input_text)
-        temp_input.seek(0)
+
+# Sentinel output for an executable that exceeded its time limit; an LLM-written
+# slow solution with an infinite loop must not hang the whole stress run
+TIMED_OUT = b'<timed out>'
+INVOKE_TIMEOUT = 2.0
+
+
+def invoke(executable: str, input_text: bytes, timeout: float = INVOKE_TIMEOUT) -> Tuple[bytes, int]:
+    try:
+        # Bytes mode skips a UTF-8 decode per call, and stderr is discarded on the
+        # happy path so there is no second pipe to drain.
+        # close_fds=False lets CPython spawn the child via posix_spawn instead of
+        # fork+exec, which skips copying the parent VM on every call
+        result = subprocess.run([executable], input=input_text, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, check=True, close_fds=False, timeout=timeout)
+        return result.stdout, result.returncode
+    except subprocess.TimeoutExpired:
+        return TIMED_OUT, -1
+    except subprocess.CalledProcessError:
+        # Failures are rare; re-run once with stderr captured to recover the diagnostic
         try:
-            result = subprocess.run(executable, stdin=temp_input, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                    text=True, check=True)
-            return result.stdout, result.returncode
-        except subprocess.CalledProcessError as e:
-            return e.stderr, e.returncode
+            rerun = subprocess.run([executable], input=input_text, capture_output=True, close_fds=False,
+                                   timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return TIMED_OUT, -1
+        return rerun.stderr, rerun.returncode
+
+
+async def _invoke_async(executable: str, input_text: bytes, timeout: float = INVOKE_TIMEOUT) -> Tuple[bytes, int]:
+    process = await asyncio.create_subprocess_exec(executable, stdin=asyncio.subprocess.PIPE,
+                                                   stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.DEVNULL)
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(input_text), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return TIMED_OUT, -1
+    if process.returncode != 0:
+        # Mirror invoke's failure path: re-run with stderr captured for the diagnostic
+        return invoke(executable, input_text, timeout=timeout)
+    return stdout, process.returncode
+
+
+def invoke_concurrently(executables: List[str], input_text: bytes,
+                        timeout: float = INVOKE_TIMEOUT) -> List[Tuple[bytes, int]]:
+    """
+    Run several executables on the same input concurrently and return their
+    (stdout, returncode) pairs in order.
+    """
+    async def _gather():
+        return await asyncio.gather(*(_invoke_async(executable, input_text, timeout) for executable in executables))
+
+    return asyncio.run(_gather())
+
+
+@functools.lru_cache(maxsize=8)
+def _code_fence_pattern(tag: str) -> 're.Pattern':
+    return re.compile(rf'```{tag}\n(.*?)```', re.DOTALL)
 
 
 def extract_code(obj: Union[AIMessage, str], tag="cpp") -> List[str]:
@@ -55,4 +168,4 @@ def extract_code(obj: Union[AIMessage, str], tag="cpp") -> List[str]:
         raw_text = obj.content
     else:
         raw_text = obj
-    return re.findall(rf'```{tag}\n(.*?)```', raw_text, re.DOTALL)
+    return _code_fence_pattern(tag).findall(raw_text)